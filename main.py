@@ -3,7 +3,8 @@ Content Idea Generator — Streamlit + OpenAI
 
 How to run:
 1. Install dependencies:
-   pip install streamlit openai
+   pip install "streamlit>=1.37" "openai>=1.17,<3" "httpx[http2]" orjson uvloop
+   (the http2 extra, orjson and uvloop are optional; uvloop is not available on Windows)
 2. Set your OpenAI API key as an environment variable:
    export OPENAI_API_KEY="sk-..."   (macOS / Linux)
    setx OPENAI_API_KEY "sk-..."     (Windows PowerShell)
@@ -16,150 +17,654 @@ from the OpenAI Chat API, parses them, and shows tools to copy/download.
 """
 
 import os
+import csv
 import json
+import hashlib
 import time
+import math
+import queue
+import asyncio
+import threading
+import importlib.util
+from collections import deque
+from contextlib import aclosing, nullcontext
+from functools import partial
 from io import StringIO
-from typing import List
+from typing import AsyncIterator, Awaitable, Callable, Iterator, List, NamedTuple, Optional, Tuple
 
+import httpx
 import streamlit as st
-import openai
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+try:
+    import orjson  # optional: Rust-backed JSON, noticeably faster on the many small parses of a stream
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop  # optional: libuv-backed event loop for the concurrent requests (not on Windows)
+except ImportError:
+    uvloop = None
 
 # ----------------------------
 # Configuration / Defaults
 # ----------------------------
 DEFAULT_MODEL = "gpt-3.5-turbo"
-MAX_TOKENS = 600
+MAX_TOKENS = 600  # ceiling for any single completion
+MIN_TOKENS = 80
+REPLY_OVERHEAD_TOKENS = 40  # the {"ideas": [...]} wrapper around the ideas themselves
+DEFAULT_IDEA_TOKENS = 35  # budget per idea; ~140 characters
 DEFAULT_NUM_IDEAS = 5
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)  # shared by concurrent shards
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None  # installed by `pip install "httpx[http2]"`
+IDEAS_PER_SHARD = 3  # ideas asked of each of the concurrent requests a generation is split into
+MAX_SHARDS = int(os.getenv("OPENAI_MAX_SHARDS", "4"))  # concurrent requests per generation; keep within your RPM budget
+SHARD_TEMPERATURE_STEP = 0.05  # per-shard temperature nudge so shards don't converge on the same ideas
+DEFAULT_BATCH_IDEAS = 50
+BATCH_COMPLETION_WINDOW = "24h"
+MAX_INFLIGHT_LIMIT = 64  # upper bound of the "Max concurrent requests" input
+# concurrent OpenAI requests; ~ RPM / 60 * avg latency (s)
+DEFAULT_MAX_INFLIGHT = min(MAX_INFLIGHT_LIMIT, max(1, int(os.getenv("OPENAI_MAX_INFLIGHT", "8"))))
+EVENT_LOOP_THREAD = "openai-event-loop"  # the shared loop is found again by this thread name after a cache clear
+COALESCE_WINDOW_S = 0.2  # "Generate More" clicks this close together are sent as one concurrent batch
 
 # ----------------------------
 # Helpers
 # ----------------------------
 
-def set_api_key_from_env_or_input():
+def json_loads(data):
+    """`json.loads` through orjson when it is installed (accepts str or bytes)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj) -> bytes:
+    """Serialize `obj` to UTF-8 JSON bytes, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+@st.cache_resource
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Start one long-lived event loop in a daemon thread.
+
+    The AsyncOpenAI client keeps its connection pool bound to the loop it first ran on, so every
+    coroutine goes through this loop instead of a fresh `asyncio.run` per click. "Clear cache"
+    only drops this entry, so the loop is picked back up from its running thread rather than
+    replaced; objects held in session state stay bound to the loop they were made on.
+    """
+    for thread in threading.enumerate():
+        if thread.name == EVENT_LOOP_THREAD and hasattr(thread, "loop"):
+            return thread.loop
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, name=EVENT_LOOP_THREAD, daemon=True)
+    thread.loop = loop
+    thread.start()
+    return loop
+
+
+def run_async(coro):
+    """Run `coro` on the shared event loop and block the script thread until it finishes."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_event_loop()).result()
+
+
+def iterate_async(agen: AsyncIterator) -> Iterator:
+    """Drive `agen` on the shared event loop, yielding its items in the script thread as they arrive."""
+    items = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put(item)
+        finally:
+            items.put(done)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), _get_event_loop())
+    try:
+        while (item := items.get()) is not done:
+            yield item
+        future.result()
+    finally:
+        future.cancel()
+
+
+@st.cache_resource(show_spinner=False)
+def get_inflight_limiter(limit: int) -> asyncio.Semaphore:
+    """Shared cap on in-flight chat completions.
+
+    Unbounded fan-out trips 429s, and the client's backoff then serializes everything; holding
+    requests at the limit keeps the concurrency without the retries.
+    """
+    return asyncio.Semaphore(limit)
+
+
+def set_api_key_from_env_or_input() -> Optional[str]:
     """Prefer environment variable but allow a one-off key in the sidebar."""
     env_key = os.getenv("OPENAI_API_KEY")
     input_key = st.sidebar.text_input("OpenAI API key (optional)", type="password")
     if input_key:
-        openai.api_key = input_key
         st.sidebar.success("Using API key from sidebar (not persisted).")
-    elif env_key:
-        openai.api_key = env_key
+        return input_key
+    if env_key:
         st.sidebar.write("Using OPENAI_API_KEY from environment.")
-    else:
-        st.sidebar.warning("No OpenAI API key found. Set OPENAI_API_KEY env variable or paste it above.")
+        return env_key
+    st.sidebar.warning("No OpenAI API key found. Set OPENAI_API_KEY env variable or paste it above.")
+    return None
+
+
+@st.cache_resource(show_spinner=False)
+def get_client(api_key: Optional[str]) -> Optional[AsyncOpenAI]:
+    """Build the AsyncOpenAI client for `api_key` once, so reruns reuse its pooled TLS connections.
+
+    With HTTP/2 the concurrent shards are multiplexed over one connection instead of each
+    paying for its own handshake.
+    """
+    if not api_key:
+        return None
+    http_client = DefaultAsyncHttpxClient(http2=HTTP2_AVAILABLE, limits=HTTP_POOL_LIMITS, timeout=HTTP_TIMEOUT)
+    return AsyncOpenAI(api_key=api_key, http_client=http_client)
 
 
 def extract_json_array(text: str) -> List[str]:
-    """Tries to extract a JSON array of strings from text returned by the model.
-    Falls back to line-splitting if JSON parse fails.
+    """Returns the ideas from a `{"ideas": [...]}` reply; a bare JSON array is accepted too.
+
+    Replies are requested in JSON mode, so they only fail to parse when cut off at max_tokens;
+    then the ideas that did complete are salvaged with the streaming parser.
     """
-    text = text.strip()
-    # Common case: model returns a JSON array
     try:
-        # Try to find the first '[' and last ']' to grab the JSON array
-        start = text.index("[")
-        end = text.rindex("]") + 1
-        candidate = text[start:end]
-        arr = json.loads(candidate)
-        if isinstance(arr, list) and all(isinstance(i, str) for i in arr):
-            return [i.strip() for i in arr if i and i.strip()]
-    except Exception:
-        pass
-
-    # Fallback: split on newlines and remove numbering/dashes
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-    cleaned = []
-    for ln in lines:
-        # Remove leading numbering like "1.", "-", "•"
-        ln = ln.lstrip("-• ")
-        # Remove numeric prefixes (e.g., "1. ")
-        if ln and ln[0].isdigit():
-            # drop leading digits and punctuation
-            i = 0
-            while i < len(ln) and (ln[i].isdigit() or ln[i] in ".) "):
-                i += 1
-            ln = ln[i:].strip()
-        if ln:
-            cleaned.append(ln)
-    return cleaned
-
-
-def call_openai_chat(prompt: str, temperature: float, model: str = DEFAULT_MODEL, max_tokens: int = MAX_TOKENS):
-    if not getattr(openai, "api_key", None):
-        raise RuntimeError("OpenAI API key is not set.")
+        data = json_loads(text)
+    except ValueError:
+        return _IdeaStreamParser().feed(text)
+    if isinstance(data, dict):
+        data = data.get("ideas", [])
+    if not isinstance(data, list):
+        return []
+    return [i.strip() for i in data if isinstance(i, str) and i.strip()]
+
+
+class _IdeaStreamParser:
+    """Incrementally pulls the string elements out of a JSON array that arrives in chunks.
+
+    Every character is looked at once, so parsing a whole stream is linear in its length rather
+    than re-parsing the growing buffer per chunk. Only strings directly inside an array are
+    returned, which skips object keys and any quoted text before the array starts.
+    """
 
+    def __init__(self):
+        self._containers = []  # open "[" / "{" brackets
+        self._literal = None  # raw chars of the string being read, quotes included
+        self._escaped = False  # the previous character was a backslash inside the string
+
+    def feed(self, chunk: str) -> List[str]:
+        """Consume `chunk` and return the array strings that closed inside it."""
+        ideas = []
+        for ch in chunk:
+            if self._literal is not None:
+                self._literal.append(ch)
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    idea = self._close_string()
+                    if idea:
+                        ideas.append(idea)
+            elif ch == '"':
+                self._literal = [ch]
+            elif ch in "[{":
+                self._containers.append(ch)
+            elif ch in "]}" and self._containers:
+                self._containers.pop()
+        return ideas
+
+    def _close_string(self) -> Optional[str]:
+        raw, self._literal = "".join(self._literal), None
+        if not self._containers or self._containers[-1] != "[":
+            return None
+        try:
+            value = json_loads(raw)
+        except ValueError:
+            return None
+        return value.strip() or None
+
+
+def token_budget(k: int, idea_tokens: int = DEFAULT_IDEA_TOKENS) -> int:
+    """max_tokens for a reply of `k` ideas. Decoding is serial, so a tighter cap is a faster reply."""
+    return max(MIN_TOKENS, min(MAX_TOKENS, REPLY_OVERHEAD_TOKENS + k * idea_tokens))
+
+
+class RequestSettings(NamedTuple):
+    """The per-request knobs from the sidebar, passed down to every chat completion as one value."""
+
+    model: str = DEFAULT_MODEL
+    temperature: float = 0.7
+    idea_tokens: int = DEFAULT_IDEA_TOKENS  # reply budget per idea, see token_budget
+    limiter: Optional[asyncio.Semaphore] = None  # shared cap on in-flight requests, see get_inflight_limiter
+
+    def for_shard(self, i: int) -> "RequestSettings":
+        """These settings with the temperature nudged for shard `i`, so shards don't converge on the same ideas."""
+        return self._replace(temperature=min(2.0, self.temperature + i * SHARD_TEMPERATURE_STEP))
+
+
+def _chat_params(prompt: str, settings: RequestSettings, max_tokens: int = MAX_TOKENS) -> dict:
+    """Chat completion request body, shared by live calls and Batch API lines."""
     messages = [
         {"role": "system", "content": (
-            "You are a helpful assistant that returns a strictly parseable JSON array "
-            "of short, actionable content-creation ideas (strings)."
+            "You are a helpful assistant that returns a JSON object of the form "
+            "{\"ideas\": [...]} holding short, actionable content-creation ideas (strings)."
         )},
         {"role": "user", "content": prompt},
     ]
+    return {
+        "model": settings.model,
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "temperature": settings.temperature,
+        "response_format": {"type": "json_object"},
+    }
 
-    resp = openai.chat.completions.create(
-        model=model,
-        messages=messages,
-        max_tokens=max_tokens,
-        temperature=temperature,
-    )
 
-    text = resp.choices[0].message.content
-    return text
+async def call_openai_chat(client: Optional[AsyncOpenAI], prompt: str, settings: RequestSettings, max_tokens: int = MAX_TOKENS) -> AsyncIterator[str]:
+    """Stream a chat completion, yielding each idea as soon as its JSON string closes.
+
+    The request holds a slot of `settings.limiter`, if set, until its stream is finished.
+    """
+    if client is None:
+        raise RuntimeError("OpenAI API key is not set.")
 
+    async with settings.limiter or nullcontext():
+        resp = await client.chat.completions.create(**_chat_params(prompt, settings, max_tokens=max_tokens), stream=True)
 
-def generate_ideas(topic: str, n: int = 5, style: str = "General", tone: str = "Practical", temperature: float = 0.7) -> List[str]:
-    """Generate `n` content ideas for `topic` and return them as a list of strings."""
-    prompt = (
+        parser = _IdeaStreamParser()
+        try:
+            async for chunk in resp:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                for idea in parser.feed(chunk.choices[0].delta.content):
+                    yield idea
+        finally:
+            await resp.close()
+
+
+def build_prompt(topic: str, n: int, style: str, tone: str) -> str:
+    return (
         f"Topic: {topic}\n"
         f"Number of ideas: {n}\n"
         f"Style: {style}\n"
         f"Tone: {tone}\n"
-        "Instructions: Return ONLY a JSON array of strings. Example: [\"Idea 1\", \"Idea 2\"]\n"
+        "Instructions: Return ONLY a JSON object with an \"ideas\" array of strings. Example: {\"ideas\": [\"Idea 1\", \"Idea 2\"]}\n"
         "Each idea should be concise (preferably < 140 characters), actionable, and unique."
     )
 
-    raw = call_openai_chat(prompt=prompt, temperature=temperature)
-    ideas = extract_json_array(raw)
 
-    # Defensive: if model gave more/less, trim/pad
-    if len(ideas) >= n:
-        return ideas[:n]
+async def _stream_shard(client: Optional[AsyncOpenAI], prompt: str, k: int, settings: RequestSettings) -> AsyncIterator[str]:
+    """Stream up to `k` ideas from a single chat completion."""
+    max_tokens = token_budget(k, settings.idea_tokens)
+    async with aclosing(call_openai_chat(client, prompt, settings, max_tokens=max_tokens)) as ideas:
+        count = 0
+        async for idea in ideas:
+            yield idea
+            count += 1
+            if count >= k:
+                return
+
+
+async def _one_shot(client: Optional[AsyncOpenAI], prompt: str, k: int, settings: RequestSettings) -> List[str]:
+    """Ask a single chat completion for up to `k` ideas."""
+    return [idea async for idea in _stream_shard(client, prompt, k, settings)]
 
-    # If fewer returned, attempt one more time with a stronger instruction
-    if len(ideas) < n:
-        fallback_prompt = (
-            f"Topic: {topic}\nNumber of ideas: {n}\nStyle: {style}\nTone: {tone}\n"
-            "Return ONLY a JSON array of exactly the requested number of ideas (strings)."
-        )
-        raw2 = call_openai_chat(prompt=fallback_prompt, temperature=temperature)
-        ideas2 = extract_json_array(raw2)
-        if len(ideas2) >= n:
-            return ideas2[:n]
+
+async def _merge_streams(streams: List[AsyncIterator[str]]) -> AsyncIterator[str]:
+    """Run several async iterators concurrently, yielding their items in arrival order."""
+    items = asyncio.Queue()
+    done = object()
+
+    async def pump(stream):
+        try:
+            async with aclosing(stream):
+                async for item in stream:
+                    await items.put(item)
+        finally:
+            await items.put(done)
+
+    tasks = [asyncio.create_task(pump(stream)) for stream in streams]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await items.get()
+            if item is done:
+                remaining -= 1
+            else:
+                yield item
+        # surface any shard that failed
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def generate_ideas_stream(
+    client: Optional[AsyncOpenAI],
+    topic: str,
+    n: int = 5,
+    style: str = "General",
+    tone: str = "Practical",
+    settings: RequestSettings = RequestSettings(),
+) -> AsyncIterator[str]:
+    """Yield `n` content ideas for `topic` as they arrive.
+
+    Decoding is serial per request, so the ideas are split across up to MAX_SHARDS concurrent
+    requests of a few ideas each; several short generations finish well before one long one.
+    """
+    shards = max(1, min(MAX_SHARDS, math.ceil(n / IDEAS_PER_SHARD)))
+    per_shard = math.ceil(n / shards)
+    prompt = build_prompt(topic, per_shard, style, tone)
+    streams = [
+        _stream_shard(client, prompt, per_shard, settings.for_shard(i))
+        for i in range(shards)
+    ]
+    seen = {}  # insertion-ordered, for deduping across shards
+    async with aclosing(_merge_streams(streams)) as ideas:
+        async for idea in ideas:
+            if idea not in seen:
+                seen[idea] = None
+                yield idea
+                if len(seen) >= n:
+                    return
+
+    # Usually the shards come back just an idea or two short (or overlapped), so rather than
+    # re-asking for all n, top up with a small request for only the missing ones.
+    missing = n - len(seen)
+    if missing == 1 and seen and settings.temperature > 0.5:
+        # A creative run one idea short isn't worth a round-trip: riff on the last idea.
+        yield f"{topic} — bonus idea: a follow-up to \"{list(seen)[-1]}\""
+        return
+    topup_prompt = build_prompt(topic, missing, style, tone)
+    if seen:
+        topup_prompt += "\nAlready covered (do not repeat):\n" + "\n".join(f"- {idea}" for idea in seen)
+    for idea in await _one_shot(client, topup_prompt, missing, settings):
+        if idea not in seen:
+            seen[idea] = None
+            yield idea
+            if len(seen) >= n:
+                return
 
     # Final fallback: return whatever we have, possibly duplicated to reach n
-    result = ideas[:]
+    result = list(seen)
     while len(result) < n:
         result.append(result[-1] + "") if result else result.append(f"{topic} - idea {len(result)+1}")
-    return result
+        yield result[-1]
+
+
+async def generate_ideas(
+    client: Optional[AsyncOpenAI],
+    topic: str,
+    n: int = 5,
+    style: str = "General",
+    tone: str = "Practical",
+    settings: RequestSettings = RequestSettings(),
+) -> List[str]:
+    """Generate `n` content ideas for `topic` and return them as a list of strings."""
+    return [idea async for idea in generate_ideas_stream(client, topic, n=n, style=style, tone=tone, settings=settings)]
+
+
+async def submit_batch(client: Optional[AsyncOpenAI], topic: str, n: int, style: str, tone: str, settings: RequestSettings) -> str:
+    """Queue `n` ideas as a Batch API job and return the batch id.
+
+    Batches cost half as much and draw on a separate rate-limit pool, at the price of finishing
+    any time within BATCH_COMPLETION_WINDOW, which suits bulk runs nobody is waiting on.
+    """
+    if client is None:
+        raise RuntimeError("OpenAI API key is not set.")
+
+    lines = [
+        json_dumps({
+            "custom_id": f"ideas-{i}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _chat_params(
+                build_prompt(topic, k, style, tone),
+                settings.for_shard(i % MAX_SHARDS),
+                max_tokens=token_budget(k, settings.idea_tokens),
+            ),
+        })
+        for i, k in enumerate(_batch_sizes(n))
+    ]
+    batch_file = await client.files.create(file=("ideas_batch.jsonl", b"\n".join(lines)), purpose="batch")
+    batch = await client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window=BATCH_COMPLETION_WINDOW,
+    )
+    return batch.id
+
+
+def _batch_sizes(n: int) -> List[int]:
+    """Split `n` ideas into IDEAS_PER_SHARD-sized batch requests whose sizes add up to exactly `n`."""
+    requests = math.ceil(n / IDEAS_PER_SHARD)
+    return [n // requests + (i < n % requests) for i in range(requests)]
+
+
+async def fetch_batch(client: Optional[AsyncOpenAI], batch_id: str, n: int) -> Tuple[str, List[str], int]:
+    """Return the status of batch `batch_id` and, once it has completed, its ideas and failed request count.
+
+    `n` is the count the batch was queued with; each reply is capped at what its request asked for
+    and the total at `n`, as on the live path.
+    """
+    if client is None:
+        raise RuntimeError("OpenAI API key is not set.")
+
+    batch = await client.batches.retrieve(batch_id)
+    if batch.status != "completed":
+        return batch.status, [], 0
+
+    failed = 0
+    if batch.error_file_id:
+        errors = await client.files.content(batch.error_file_id)
+        failed = sum(1 for line in errors.content.splitlines() if line.strip())
+    ideas = {}  # insertion-ordered, for deduping across requests
+    if batch.output_file_id:
+        sizes = _batch_sizes(n)
+        output = await client.files.content(batch.output_file_id)
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            record = json_loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                failed += 1
+                continue
+            k = sizes[int(record["custom_id"].rsplit("-", 1)[1])]
+            for choice in (response.get("body") or {}).get("choices", []):
+                for idea in extract_json_array(choice["message"]["content"] or "")[:k]:
+                    ideas[idea] = None
+    if batch.request_counts is not None:
+        failed = max(failed, batch.request_counts.failed)
+    return batch.status, list(ideas)[:n], failed
+
+
+class _MoreBatcher:
+    """Coalesces "Generate More" clicks that land within COALESCE_WINDOW_S into one concurrent batch.
+
+    The first click of a window schedules a flush that waits the window out and then runs every
+    queued job with a single `asyncio.gather`. Results are held until a script run drains them,
+    so a run cut short by the next click loses nothing. Methods run on the shared event loop.
+    """
+
+    def __init__(self):
+        self._queue = deque()
+        self._flush = None
+        self._inflight = 0
+        self._ideas = []
+        self._errors = []
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def busy(self) -> bool:
+        """Whether any queued, running or not yet drained work is left."""
+        return not self._idle.is_set() or bool(self._ideas or self._errors)
+
+    async def submit(self, job: Callable[[], Awaitable[List[str]]]) -> None:
+        self._queue.append(job)
+        self._idle.clear()
+        if self._flush is None:
+            self._flush = asyncio.create_task(self._flush_after_window())
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(COALESCE_WINDOW_S)
+        jobs = list(self._queue)
+        self._queue.clear()
+        self._flush = None
+        self._inflight += 1
+        try:
+            results = await asyncio.gather(*(job() for job in jobs), return_exceptions=True)
+        finally:
+            self._inflight -= 1
+        for result in results:
+            if isinstance(result, BaseException):
+                self._errors.append(result)
+            else:
+                self._ideas.extend(result)
+        if not self._inflight and self._flush is None:
+            self._idle.set()
+
+    async def drain(self, timeout: float) -> Optional[Tuple[List[str], List[BaseException]]]:
+        """Wait up to `timeout` for all queued clicks to resolve and return their ideas and errors.
+
+        None means they are still running.
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        ideas, errors = self._ideas, self._errors
+        self._ideas, self._errors = [], []
+        return ideas, errors
 
 
 # ----------------------------
 # Streamlit UI
 # ----------------------------
 
+@st.cache_data(ttl=3600, max_entries=256, show_spinner=False, hash_funcs={RequestSettings: lambda s: (s.model, s.temperature, s.idea_tokens)})
+def _cached_generate(_client: Optional[AsyncOpenAI], key_hash: str, topic: str, n: int, style: str, tone: str, settings: RequestSettings) -> List[str]:
+    """Memoized streamed generation; the client and limiter are left out of the cache key.
+
+    `key_hash` stands in for the client so answers are never shared between API keys. On a miss
+    the ideas still stream into the page as they arrive; a hit returns them at once.
+    """
+    return stream_ideas(generate_ideas_stream(_client, topic, n=n, style=style, tone=tone, settings=settings))
+
+
+def fetch_ideas(client: Optional[AsyncOpenAI], topic: str, n: int, style: str, tone: str, settings: RequestSettings) -> List[str]:
+    """Get ideas for the given inputs, streaming them into the page unless a cached answer applies.
+
+    Only temperature 0 is cached: at any other temperature a repeat click is a request for fresh ideas.
+    """
+    if settings.temperature == 0:
+        key_hash = hashlib.sha256(client.api_key.encode()).hexdigest() if client else ""
+        return _cached_generate(client, key_hash, topic, n, style, tone, settings)
+    return stream_ideas(generate_ideas_stream(client, topic, n=n, style=style, tone=tone, settings=settings))
+
+
+@st.cache_data(show_spinner=False)
+def build_exports(ideas: Tuple[str, ...]) -> Tuple[bytes, str]:
+    """Return the (CSV bytes, numbered text) downloads for `ideas`, memoized per ideas list."""
+    txt = "\n".join(f"{i}. {it}" for i, it in enumerate(ideas, start=1))
+    csv_io = StringIO()
+    writer = csv.writer(csv_io, lineterminator="\n")
+    writer.writerow(("index", "idea"))
+    writer.writerows(enumerate(ideas, start=1))
+    return csv_io.getvalue().encode("utf-8"), txt
+
+
+def append_ideas(new: List[str]) -> int:
+    """Append the ideas from `new` that aren't shown yet and return how many were added.
+
+    Ideas are kept as an immutable tuple with a frozenset `ideas_idx` beside it for O(1)
+    duplicate checks. Appending to either copies it, so each call is O(N) in the ideas shown.
+    """
+    fresh = tuple(dict.fromkeys(idea for idea in new if idea not in st.session_state.ideas_idx))
+    st.session_state.ideas += fresh
+    st.session_state.ideas_idx |= frozenset(fresh)
+    return len(fresh)
+
+
+def stream_ideas(ideas: AsyncIterator[str]) -> List[str]:
+    """Render ideas from `ideas` as they arrive and return them once the stream is exhausted."""
+    placeholder = st.empty()
+    received = []
+    for idea in iterate_async(ideas):
+        received.append(idea)
+        placeholder.markdown("\n\n".join(f"**{i}.** {it}" for i, it in enumerate(received, start=1)))
+    placeholder.empty()
+    return received
+
+
+@st.fragment
+def render_ideas():
+    """Ideas list plus bulk tools.
+
+    As a fragment, interacting with the widgets in here (export toggle, downloads, clear) reruns
+    only this part of the page instead of the whole script.
+    """
+    if not st.session_state.ideas:
+        return
+
+    st.subheader("Ideas")
+    # numbered display + small action buttons
+    for i, idea in enumerate(st.session_state.ideas, start=1):
+        st.markdown(f"**{i}.** {idea}")
+
+    st.divider()
+    with st.expander("Bulk tools", expanded=False):
+        # Building the exports encodes every idea; skip it on reruns until someone asks for them
+        if st.checkbox("Show copy / download options", key="show_exports"):
+            csv_bytes, joined = build_exports(st.session_state.ideas)
+            st.text_area("Copy all ideas", value=joined, height=150)
+
+            # CSV download
+            st.download_button("Download CSV", data=csv_bytes, file_name="content_ideas.csv", mime="text/csv")
+
+            # TXT download
+            st.download_button("Download TXT", data=joined, file_name="content_ideas.txt", mime="text/plain")
+
+    # Clear
+    if st.button("Clear ideas"):
+        st.session_state.ideas = ()
+        st.session_state.ideas_idx = frozenset()
+        st.session_state.topic = ""
+        st.rerun()
+
+
 def main():
     st.set_page_config(page_title="Content Idea Generator", layout="centered")
     st.title("⚡ Content Idea Generator — 1-hour MVP")
 
     # Sidebar controls
     st.sidebar.header("Settings")
-    set_api_key_from_env_or_input()
+    client = get_client(set_api_key_from_env_or_input())
 
     model = st.sidebar.selectbox("Model", options=["gpt-3.5-turbo"], index=0, help="Choose model (default: gpt-3.5-turbo).")
     num_ideas = st.sidebar.slider("Ideas per generation", min_value=1, max_value=20, value=DEFAULT_NUM_IDEAS)
     temp = st.sidebar.slider("Creativity (temperature)", min_value=0.0, max_value=1.0, value=0.7)
     style = st.sidebar.selectbox("Style/template", options=["General", "Listicle", "How-to", "Twitter thread", "Video hook", "Newsletter subject"], index=0)
     tone = st.sidebar.selectbox("Tone", options=["Practical", "Persuasive", "Funny", "Curious", "Controversial"], index=0)
+    with st.sidebar.expander("Advanced"):
+        idea_tokens = st.slider(
+            "Max idea length (tokens)", min_value=15, max_value=80, value=DEFAULT_IDEA_TOKENS,
+            help="Caps each reply at roughly this many tokens per idea; shorter caps come back faster.",
+        )
+        max_inflight = st.number_input(
+            "Max concurrent requests", min_value=1, max_value=MAX_INFLIGHT_LIMIT, value=DEFAULT_MAX_INFLIGHT,
+            help="Upper bound on OpenAI requests in flight at once; lower it if you hit rate limits (429).",
+        )
+    settings = RequestSettings(model=model, temperature=temp, idea_tokens=idea_tokens, limiter=get_inflight_limiter(int(max_inflight)))
 
     st.markdown(
         "Use this tool to generate quick, actionable content ideas. Keep scope narrow for better results (e.g., 'vegan breakfast recipes' rather than 'food')."
@@ -174,7 +679,8 @@ def main():
         gen_more_btn = st.button("Generate More (append)")
 
     if "ideas" not in st.session_state:
-        st.session_state.ideas = []
+        st.session_state.ideas = ()
+        st.session_state.ideas_idx = frozenset()
         st.session_state.topic = ""
 
     if gen_btn:
@@ -184,56 +690,89 @@ def main():
             with st.spinner("Generating ideas…"):
                 try:
                     start = time.time()
-                    ideas = generate_ideas(topic=topic, n=num_ideas, style=style, tone=tone, temperature=temp)
+                    ideas = fetch_ideas(client, topic, num_ideas, style, tone, settings)
                     took = time.time() - start
-                    st.session_state.ideas = ideas
+                    st.session_state.ideas = tuple(dict.fromkeys(ideas))  # padding can repeat an idea
+                    st.session_state.ideas_idx = frozenset(st.session_state.ideas)
                     st.session_state.topic = topic
-                    st.success(f"Generated {len(ideas)} ideas (took {took:.1f}s)")
+                    st.success(f"Generated {len(st.session_state.ideas)} ideas (took {took:.1f}s)")
                 except Exception as e:
                     st.exception(e)
 
+    if "more_batcher" not in st.session_state:
+        st.session_state.more_batcher = _MoreBatcher()
+    batcher = st.session_state.more_batcher
+
     if gen_more_btn:
         if not st.session_state.topic:
             st.error("No previous topic — press 'Generate Ideas' first or enter a topic.")
         else:
-            with st.spinner("Generating additional ideas…"):
+            job = partial(generate_ideas, client, st.session_state.topic, n=num_ideas, style=style, tone=tone, settings=settings)
+            run_async(batcher.submit(job))
+
+    if batcher.busy:
+        with st.spinner("Generating additional ideas…"):
+            status = st.empty()
+            try:
+                while (drained := run_async(batcher.drain(timeout=COALESCE_WINDOW_S))) is None:
+                    # Updating the page lets a click queued meanwhile stop this run and join the batch
+                    status.caption("Waiting for queued requests…")
+                status.empty()
+                more, errors = drained
+                for err in errors:
+                    st.warning(f"A 'Generate More' request failed: {err}")
+                if more or not errors:
+                    added = append_ideas(more)
+                    st.success(f"Appended {added} more ideas — now {len(st.session_state.ideas)} total")
+            except Exception as e:
+                status.empty()
+                st.exception(e)
+
+    with st.expander("Batch mode (half price, results within 24h)"):
+        batch_ideas = st.number_input("Ideas to queue", min_value=IDEAS_PER_SHARD, max_value=500, value=DEFAULT_BATCH_IDEAS, step=10)
+        col3, col4 = st.columns([1, 1])
+        with col3:
+            queue_btn = st.button("Queue batch")
+        with col4:
+            check_btn = st.button("Check status")
+
+        if queue_btn:
+            if not topic:
+                st.error("Please enter a topic before queueing a batch.")
+            else:
                 try:
-                    more = generate_ideas(topic=st.session_state.topic, n=num_ideas, style=style, tone=tone, temperature=temp)
-                    st.session_state.ideas += more
-                    st.success(f"Appended {len(more)} more ideas — now {len(st.session_state.ideas)} total")
+                    st.session_state.batch_id = run_async(submit_batch(client, topic, int(batch_ideas), style, tone, settings))
+                    st.session_state.batch_topic = topic
+                    st.session_state.batch_n = int(batch_ideas)
+                    st.success(f"Queued batch {st.session_state.batch_id} — use 'Check status' to collect the ideas.")
                 except Exception as e:
                     st.exception(e)
 
+        if check_btn and not st.session_state.get("batch_id"):
+            st.info("No batch queued yet.")
+        elif check_btn:
+            try:
+                status, batched, failed = run_async(fetch_batch(client, st.session_state.batch_id, st.session_state.batch_n))
+                if status == "completed":
+                    st.session_state.batch_id = None
+                    if failed:
+                        st.warning(f"{failed} of the batch's requests failed.")
+                    if batched:
+                        added = append_ideas(batched)
+                        st.session_state.topic = st.session_state.batch_topic
+                        st.success(f"Batch complete — added {added} ideas, now {len(st.session_state.ideas)} total")
+                    else:
+                        st.error("Batch completed without returning any ideas.")
+                elif status in ("failed", "expired", "cancelled"):
+                    st.session_state.batch_id = None
+                    st.error(f"Batch {status}.")
+                else:
+                    st.info(f"Batch status: {status}")
+            except Exception as e:
+                st.exception(e)
+
     # Display results
-    if st.session_state.ideas:
-        st.subheader("Ideas")
-        # numbered display + small action buttons
-        for i, idea in enumerate(st.session_state.ideas, start=1):
-            st.markdown(f"**{i}.** {idea}")
-
-        st.divider()
-        st.subheader("Bulk tools")
-        joined = "\n".join([f"{i+1}. {it}" for i, it in enumerate(st.session_state.ideas)])
-        st.text_area("Copy all ideas", value=joined, height=150)
-
-        # CSV download
-        csv_io = StringIO()
-        csv_io.write("index,idea\n")
-        for idx, it in enumerate(st.session_state.ideas, start=1):
-            # escape double quotes
-            safe = it.replace('"', '""')
-            csv_io.write(f"{idx},\"{safe}\"\n")
-        csv_bytes = csv_io.getvalue().encode("utf-8")
-        st.download_button("Download CSV", data=csv_bytes, file_name="content_ideas.csv", mime="text/csv")
-
-        # TXT download
-        st.download_button("Download TXT", data=joined, file_name="content_ideas.txt", mime="text/plain")
-
-        # Clear
-        if st.button("Clear ideas"):
-            st.session_state.ideas = []
-            st.session_state.topic = ""
-            st.experimental_rerun()
+    render_ideas()
 
     # Footer / tips
     st.markdown("---")
@@ -31,7 +31,7 @@ pip install --upgrade pip
 
 # --- Step 5: Install dependencies ---
 echo "Installing required libraries..."
-pip install --upgrade streamlit openai
+pip install --upgrade "streamlit>=1.37" "openai>=1.17,<3" "httpx[http2]" orjson uvloop
 
 # --- Step 6: Run Streamlit app ---
 echo "Launching Streamlit app..."